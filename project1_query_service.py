@@ -0,0 +1,422 @@
+import pandas as pd
+import os
+import json
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+DEFAULT_DATA_PATH = r"D:\fcicb6\project1 - preprocessed_data.csv"
+
+# 쿼리 파라미터 이름 -> 실제 컬럼명
+DIMENSIONS = {
+    'seller': '셀러명',
+    'channel': '주문경로',
+    'region': '광역지역(정식)',
+    'product': '품종',
+    'group': '그룹',
+    'date': '주문일자',
+}
+
+
+def load_data(file_path):
+    # 대시보드와 동일한 전처리
+    df = pd.read_csv(file_path)
+    price_cols = ['실결제 금액', '결제금액', '판매단가', '공급단가']
+    for col in price_cols:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = df[col].str.replace(',', '').astype(float)
+    df['주문일'] = pd.to_datetime(df['주문일'])
+    df['주문일자'] = df['주문일'].dt.strftime('%Y-%m-%d')
+    # 그룹 분리
+    df['그룹'] = df['셀러명'].apply(lambda x: '킹댕즈' if x == '킹댕즈' else '일반 셀러')
+    return df
+
+
+def _records(frame):
+    # NaN/날짜를 JSON 호환 값으로 변환
+    return json.loads(frame.to_json(orient='records', force_ascii=False, date_format='iso'))
+
+
+def _series_dict(series):
+    # 건수(value_counts)는 정수, 비율/금액은 실수로 유지
+    cast = int if pd.api.types.is_integer_dtype(series) else float
+    return {str(k): cast(v) for k, v in series.items()}
+
+
+class QueryError(ValueError):
+    pass
+
+
+class DataLoadError(RuntimeError):
+    pass
+
+
+class OrderStore:
+    """주문 데이터를 한 번만 로드하고, 파일이 바뀌면 다시 로드한다."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.df = None
+        self.version = None
+        self.error = None
+        self._failed_version = None
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        stat = os.stat(self.file_path)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    def get(self):
+        with self._lock:
+            version = None
+            try:
+                version = self._file_version()
+                if version == self._failed_version:
+                    pass
+                elif version != self.version:
+                    self.df = load_data(self.file_path)
+                    self.version = version
+                    self.error = None
+                else:
+                    self.error = None
+            except FileNotFoundError:
+                self.error = f"파일을 찾을 수 없습니다: {self.file_path}"
+            except OSError as e:
+                # 권한 문제 등 일시적인 접근 오류: 다음 요청에서 다시 시도
+                self.error = f"파일에 접근할 수 없습니다: {type(e).__name__}: {e}"
+            except Exception as e:
+                # 저장 중이거나 손상된 파일: 같은 버전은 다시 읽지 않고, 이전 데이터가 있으면 계속 제공
+                self._failed_version = version
+                self.error = f"데이터 로드 실패: {type(e).__name__}: {e}"
+            if self.df is None:
+                raise DataLoadError(self.error)
+            return self.df, self.version
+
+
+class LRUCache:
+    """(엔드포인트, 파라미터, 데이터 버전) -> (ETag, 응답 바이트) 캐시"""
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._items), "max_size": self.max_size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# --- 파라미터 처리 ---
+
+# 모든 엔드포인트 공통 필터 (기본값 없음)
+FILTER_PARAMS = {name: None for name in
+                 ('groups', 'seller', 'channel', 'region', 'product', 'start', 'end', 'repeat_only')}
+# 순서와 무관한 목록형 파라미터
+LIST_PARAMS = {'groups', 'seller', 'channel', 'region', 'product'}
+# 0 이상의 정수 (top=0은 모든 엔드포인트에서 '전체')
+INT_PARAMS = {'top', 'limit', 'min_orders'}
+DATE_PARAMS = {'start', 'end'}
+
+
+def normalize_params(raw, defaults):
+    """엔드포인트가 사용하는 파라미터만 남기고 정규화한다 (캐시 키 용도).
+
+    목록형 값은 정렬/중복 제거하고, 정수와 날짜(YYYY-MM-DD)는 표준 표기로 바꾸고, 기본값을 채운다.
+    """
+    params = {}
+    for name, default in {**FILTER_PARAMS, **defaults}.items():
+        values = raw.get(name)
+        value = values[-1].strip() if values else ''
+        if not value:
+            value = default
+        if value is None:
+            continue
+        if name in LIST_PARAMS:
+            value = ','.join(sorted({v.strip() for v in value.split(',') if v.strip()}))
+            if not value:
+                continue
+        elif name in INT_PARAMS:
+            try:
+                value = str(int(value))
+            except ValueError:
+                raise QueryError(f"{name}는 정수여야 합니다: {value}")
+            if int(value) < 0:
+                raise QueryError(f"{name}는 0 이상이어야 합니다: {value}")
+        elif name in DATE_PARAMS:
+            try:
+                value = pd.to_datetime(value).strftime('%Y-%m-%d')
+            except (ValueError, OverflowError):
+                raise QueryError(f"{name}는 날짜(YYYY-MM-DD)여야 합니다: {value}")
+        elif name == 'repeat_only':
+            if value not in ('1', 'true'):
+                continue
+            value = '1'
+        params[name] = value
+    if 'start' in params and 'end' in params and params['start'] > params['end']:
+        raise QueryError(f"start가 end보다 늦습니다: {params['start']} > {params['end']}")
+    return params
+
+
+def _dimensions(value):
+    names = value.split(',')
+    if len(set(names)) != len(names):
+        raise QueryError(f"차원이 중복되었습니다: {value}")
+    for name in names:
+        if name not in DIMENSIONS:
+            raise QueryError(f"지원하지 않는 차원입니다: {name} (가능: {', '.join(DIMENSIONS)})")
+    return [DIMENSIONS[name] for name in names]
+
+
+def _top(obj, params):
+    # top=0이면 전체
+    top = int(params['top'])
+    return obj.head(top) if top > 0 else obj
+
+
+def apply_filters(df, params):
+    # 공통 필터: groups, seller, channel, region, product, start/end (양 끝 포함), repeat_only
+    if 'groups' in params:
+        df = df[df['그룹'].isin(params['groups'].split(','))]
+    for name in ('seller', 'channel', 'region', 'product'):
+        if name in params:
+            df = df[df[DIMENSIONS[name]].isin(params[name].split(','))]
+    if 'start' in params:
+        df = df[df['주문일자'] >= params['start']]
+    if 'end' in params:
+        df = df[df['주문일자'] <= params['end']]
+    if 'repeat_only' in params:
+        df = df[df['재구매 횟수'] > 0]
+    return df
+
+
+# --- 엔드포인트 ---
+
+# metric -> 결과 컬럼명
+METRIC_COLUMNS = {
+    'sum': '실결제 금액',
+    'mean': '평균 결제금액',
+    'count': '주문건수',
+}
+
+
+def query_summary(df, params):
+    revenue = float(df['실결제 금액'].sum())
+    orders = len(df)
+    return {
+        "total_revenue": revenue,
+        "total_orders": orders,
+        "aov": revenue / orders if orders else 0.0,
+        "repeat_rate": float((df['재구매 횟수'] > 0).mean() * 100) if orders else 0.0,
+    }
+
+
+def query_revenue(df, params):
+    # 예: /revenue?by=seller,channel&top=10
+    # date가 포함되면 날짜순으로 정렬하고, top은 최근 N일(날짜 구간)을 의미한다.
+    by = _dimensions(params['by'])
+    metric = params['metric']
+    if metric not in METRIC_COLUMNS:
+        raise QueryError(f"지원하지 않는 metric입니다: {metric}")
+    value_col = METRIC_COLUMNS[metric]
+    result = df.groupby(by)['실결제 금액'].agg(metric).rename(value_col).reset_index()
+    if '주문일자' in by:
+        result = result.sort_values(by=['주문일자'] + [col for col in by if col != '주문일자'])
+        top = int(params['top'])
+        if top > 0:
+            recent_dates = result['주문일자'].drop_duplicates().tail(top)
+            result = result[result['주문일자'].isin(recent_dates)]
+    else:
+        result = _top(result.sort_values(by=value_col, ascending=False), params)
+    return _records(result)
+
+
+def query_channels(df, params):
+    # 채널별 성과 지표 (매출, 주문건수, 고객수)
+    ch_summary = df.groupby('주문경로').agg({
+        '실결제 금액': 'sum',
+        '주문번호': 'count',
+        'UID': 'nunique'
+    }).rename(columns={'실결제 금액': '총 매출액', '주문번호': '주문건수', 'UID': '고객수'}).reset_index()
+    return _records(ch_summary.sort_values(by='총 매출액', ascending=False))
+
+
+def query_products(df, params):
+    prod_rank = _top(df['품종'].value_counts(), params).reset_index()
+    prod_rank.columns = ['품종', 'count']
+    return _records(prod_rank)
+
+
+def query_combinations(df, params):
+    # 예: /combinations?dims=channel,seller&value=count&repeat_only=1
+    dims = _dimensions(params['dims'])
+    value = params['value']
+    if value == 'revenue':
+        combo = df.groupby(dims)['실결제 금액'].sum().reset_index(name='매출')
+        sort_col = '매출'
+    elif value == 'count':
+        combo = df.groupby(dims).size().reset_index(name='건수')
+        sort_col = '건수'
+    else:
+        raise QueryError(f"지원하지 않는 value입니다: {value}")
+    return _records(_top(combo.sort_values(by=sort_col, ascending=False), params))
+
+
+def query_loyalty(df, params):
+    # 예: /loyalty?by=seller&min_orders=30&top=10
+    by = _dimensions(params['by'])
+    if len(by) != 1 or by[0] in ('주문일자', '그룹'):
+        raise QueryError(f"loyalty의 by는 seller, channel, region, product 중 하나여야 합니다: {params['by']}")
+    col = by[0]
+    min_orders = int(params['min_orders'])
+    repeat_df = df[df['재구매 횟수'] > 0]
+    total = df[col].value_counts()
+    repeat_orders = repeat_df[col].value_counts()
+    ratio = (repeat_orders / total * 100).fillna(0)
+    ratio = ratio.loc[total[total >= min_orders].index]
+    return {
+        "top_repeat_orders": _series_dict(_top(repeat_orders, params)),
+        "top_repeat_ratio": _series_dict(_top(ratio.sort_values(ascending=False), params)),
+        "top_products": _series_dict(_top(repeat_df['품종'].value_counts(), params)),
+        "avg_repeat_count": float(repeat_df['재구매 횟수'].mean()) if len(repeat_df) else 0.0,
+    }
+
+
+def query_recent(df, params):
+    return _records(df.sort_values(by='주문일', ascending=False).head(int(params['limit'])))
+
+
+# 경로 -> (핸들러, 공통 필터 외에 사용하는 파라미터와 기본값)
+ENDPOINTS = {
+    '/summary': (query_summary, {}),
+    '/revenue': (query_revenue, {'by': 'seller', 'metric': 'sum', 'top': '0'}),
+    '/channels': (query_channels, {}),
+    '/products': (query_products, {'top': '10'}),
+    '/combinations': (query_combinations, {'dims': 'channel,seller', 'value': 'revenue', 'top': '10'}),
+    '/loyalty': (query_loyalty, {'by': 'seller', 'min_orders': '0', 'top': '10'}),
+    '/recent': (query_recent, {'limit': '50'}),
+}
+
+
+def run_query(store, cache, path, raw_params):
+    """쿼리를 실행하고 (ETag, 응답 바이트, 데이터 버전)을 돌려준다."""
+    handler, defaults = ENDPOINTS[path]
+    params = normalize_params(raw_params, defaults)
+    df, version = store.get()
+    key = (path, tuple(sorted(params.items())), version)
+    cached = cache.get(key)
+    if cached is None:
+        result = handler(apply_filters(df, params), params)
+        body = json.dumps({"version": version, "data": result}, ensure_ascii=False).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        cached = (etag, body)
+        cache.put(key, cached)
+    etag, body = cached
+    return etag, body, version
+
+
+def etag_matches(header, etag):
+    # If-None-Match: "a", W/"b", *
+    for tag in (header or '').split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == '*' or tag == etag:
+            return True
+    return False
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    store = None
+    cache = None
+
+    def _send(self, status, body=b"", etag=None, version=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        if version:
+            self.send_header('X-Data-Version', version)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+
+        if url.path == '/health':
+            try:
+                df, version = self.store.get()
+            except DataLoadError as e:
+                return self._send_json(503, {"status": "error", "error": str(e)})
+            # error가 있으면 이전 버전 데이터를 제공 중
+            return self._send_json(200, {"status": "ok" if self.store.error is None else "stale",
+                                         "version": version, "rows": len(df), "error": self.store.error,
+                                         "cache": self.cache.stats()})
+
+        if url.path not in ENDPOINTS:
+            return self._send_json(404, {"error": f"알 수 없는 엔드포인트: {url.path}",
+                                         "endpoints": sorted(ENDPOINTS)})
+        try:
+            etag, body, version = run_query(self.store, self.cache, url.path, parse_qs(url.query))
+        except QueryError as e:
+            return self._send_json(400, {"error": str(e)})
+        except DataLoadError as e:
+            return self._send_json(503, {"error": str(e)})
+        except Exception as e:
+            self.log_error("쿼리 처리 실패 %s: %s: %s", self.path, type(e).__name__, e)
+            return self._send_json(500, {"error": f"서버 내부 오류: {type(e).__name__}: {e}"})
+
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            return self._send(304, etag=etag, version=version)
+        self._send(200, body, etag=etag, version=version)
+
+
+def run_server(file_path, host='127.0.0.1', port=8765, cache_size=256):
+    QueryHandler.store = OrderStore(file_path)
+    QueryHandler.cache = LRUCache(cache_size)
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    print(f"--- 집계 쿼리 서비스 실행: http://{host}:{port} ---")
+    print(f"데이터 파일: {file_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="주문 데이터 집계 쿼리 서비스")
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=256)
+    args = parser.parse_args()
+    run_server(args.data, args.host, args.port, args.cache_size)
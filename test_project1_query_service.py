@@ -0,0 +1,240 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pandas as pd
+import pytest
+
+import project1_query_service as qs
+
+
+ROWS = [
+    # 주문번호, UID, 셀러명, 주문경로, 광역지역(정식), 품종, 실결제 금액, 주문일, 재구매 횟수
+    (1, 10, '킹댕즈', '카카오', '서울', '귤', '10,000', '2026-01-10', 0),
+    (2, 11, '킹댕즈', '네이버', '부산', '한라봉', '20,000', '2026-01-11', 2),
+    (3, 12, 'A', '카카오', '서울', '귤', '5,000', '2026-01-10', 1),
+    (4, 12, 'A', '카카오', '서울', '귤', '5,000', '2026-01-12', 3),
+    (5, 13, 'B', '네이버', '경기', '한라봉', '7,000', '2026-01-12', 0),
+]
+COLUMNS = ['주문번호', 'UID', '셀러명', '주문경로', '광역지역(정식)', '품종', '실결제 금액', '주문일', '재구매 횟수']
+
+
+def write_csv(path, rows=ROWS):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / 'orders.csv'
+    write_csv(path)
+    return qs.OrderStore(str(path))
+
+
+def query(store, cache, path, **params):
+    etag, body, version = qs.run_query(store, cache, path, {k: [v] for k, v in params.items()})
+    return json.loads(body)['data']
+
+
+# --- LRU 캐시 ---
+
+def test_lru_evicts_least_recently_used():
+    cache = qs.LRUCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 3, "misses": 1}
+
+
+def test_equivalent_params_share_cache_entry(store):
+    cache = qs.LRUCache()
+    first = query(store, cache, '/summary', groups='킹댕즈,일반 셀러')
+    assert query(store, cache, '/summary', groups='일반 셀러,킹댕즈') == first
+    assert query(store, cache, '/summary', groups='일반 셀러,킹댕즈', top='5', _='123') == first
+    query(store, cache, '/revenue')
+    query(store, cache, '/revenue', by='seller', metric='sum', top='00')
+    assert cache.stats()['size'] == 2
+    assert cache.stats()['hits'] == 3
+
+
+def test_data_version_change_invalidates_cache(store, tmp_path):
+    cache = qs.LRUCache()
+    etag1, _, version1 = qs.run_query(store, cache, '/summary', {})
+    write_csv(tmp_path / 'orders.csv', ROWS[:2])
+    etag2, body, version2 = qs.run_query(store, cache, '/summary', {})
+    assert version1 != version2
+    assert etag1 != etag2
+    assert json.loads(body)['data']['total_orders'] == 2
+
+
+# --- 데이터 로드 실패 ---
+
+def test_malformed_file_keeps_previous_data(store, tmp_path):
+    df, version = store.get()
+    (tmp_path / 'orders.csv').write_text('셀러명,주문일\nA,not-a-date\n', encoding='utf-8')
+    df2, version2 = store.get()
+    assert df2 is df and version2 == version
+    assert store.error.startswith('데이터 로드 실패')
+
+
+def test_unreadable_file_stat_keeps_previous_data(store, monkeypatch):
+    df, version = store.get()
+
+    def denied():
+        raise PermissionError('denied')
+    monkeypatch.setattr(store, '_file_version', denied)
+    assert store.get() == (df, version)
+    assert store.error.startswith('파일에 접근할 수 없습니다')
+    fresh = qs.OrderStore(store.file_path)
+    monkeypatch.setattr(fresh, '_file_version', denied)
+    with pytest.raises(qs.DataLoadError):
+        fresh.get()
+
+
+def test_malformed_file_without_previous_data(tmp_path):
+    path = tmp_path / 'orders.csv'
+    path.write_text('셀러명\nA\n', encoding='utf-8')
+    with pytest.raises(qs.DataLoadError):
+        qs.OrderStore(str(path)).get()
+    with pytest.raises(qs.DataLoadError):
+        qs.OrderStore(str(tmp_path / 'missing.csv')).get()
+
+
+# --- 엔드포인트 결과 ---
+
+def test_repeated_dimensions_rejected(store):
+    cache = qs.LRUCache()
+    with pytest.raises(qs.QueryError):
+        query(store, cache, '/revenue', by='seller,seller')
+    with pytest.raises(qs.QueryError):
+        query(store, cache, '/combinations', dims='channel,channel')
+
+
+def test_bad_params_rejected(store):
+    cache = qs.LRUCache()
+    with pytest.raises(qs.QueryError):
+        query(store, cache, '/revenue', by='foo')
+    with pytest.raises(qs.QueryError):
+        query(store, cache, '/revenue', metric='max')
+    with pytest.raises(qs.QueryError):
+        query(store, cache, '/products', top='ten')
+
+
+def test_bad_dates_rejected(store):
+    cache = qs.LRUCache()
+    for bad in ('garbage', '2026-13-01'):
+        with pytest.raises(qs.QueryError):
+            query(store, cache, '/summary', start=bad)
+    with pytest.raises(qs.QueryError):
+        query(store, cache, '/summary', start='2026-01-12', end='2026-01-10')
+
+
+def test_date_range_is_inclusive_and_canonical(store):
+    cache = qs.LRUCache()
+    data = query(store, cache, '/summary', start='2026-01-11', end='2026-01-12')
+    assert data['total_orders'] == 3
+    assert query(store, cache, '/summary', start='2026/01/11', end='2026-1-12') == data
+    assert cache.stats()['size'] == 1
+
+
+def test_negative_ints_rejected_and_top_zero_means_all(store):
+    cache = qs.LRUCache()
+    for path, name in (('/products', 'top'), ('/recent', 'limit'), ('/loyalty', 'min_orders')):
+        with pytest.raises(qs.QueryError):
+            query(store, cache, path, **{name: '-1'})
+    assert len(query(store, cache, '/products', top='0')) == 2
+    assert len(query(store, cache, '/combinations', top='0')) == 4
+    assert len(query(store, cache, '/revenue', by='seller', top='0')) == 3
+    assert len(query(store, cache, '/loyalty', top='0')['top_repeat_ratio']) == 3
+
+
+def test_loyalty_requires_single_entity_dimension(store):
+    cache = qs.LRUCache()
+    for by in ('seller,channel', 'date', 'group'):
+        with pytest.raises(qs.QueryError):
+            query(store, cache, '/loyalty', by=by)
+
+
+def test_revenue_by_date_is_chronological(store):
+    cache = qs.LRUCache()
+    data = query(store, cache, '/revenue', by='group,date')
+    assert [row['주문일자'] for row in data] == sorted(row['주문일자'] for row in data)
+    # date 쿼리의 top은 최근 N일
+    recent = query(store, cache, '/revenue', by='seller,date', top='1')
+    assert {row['주문일자'] for row in recent} == {'2026-01-12'}
+    assert len(recent) == 2
+
+
+def test_revenue_metric_column_names(store):
+    cache = qs.LRUCache()
+    assert query(store, cache, '/revenue', by='seller', top='1') == [{'셀러명': '킹댕즈', '실결제 금액': 30000.0}]
+    assert query(store, cache, '/revenue', by='seller', metric='count', top='1')[0] == {'셀러명': 'A', '주문건수': 2}
+    assert '평균 결제금액' in query(store, cache, '/revenue', by='channel', metric='mean')[0]
+
+
+def test_loyalty_counts_are_integers(store):
+    data = query(store, qs.LRUCache(), '/loyalty', by='seller')
+    assert data['top_repeat_orders'] == {'A': 2, '킹댕즈': 1}
+    assert all(isinstance(v, int) for v in data['top_products'].values())
+    assert data['top_repeat_ratio']['A'] == 100.0
+
+
+def test_etag_matches():
+    assert qs.etag_matches('"abc"', '"abc"')
+    assert qs.etag_matches('"x", W/"abc"', '"abc"')
+    assert qs.etag_matches('*', '"abc"')
+    assert not qs.etag_matches('"abcd"', '"abc"')
+    assert not qs.etag_matches('"xabc", "ab"', '"abc"')
+    assert not qs.etag_matches(None, '"abc"')
+
+
+# --- HTTP ---
+
+@pytest.fixture
+def server(store):
+    qs.QueryHandler.store = store
+    qs.QueryHandler.cache = qs.LRUCache()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), qs.QueryHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def http_get(url, headers=None):
+    try:
+        with urlopen(Request(url, headers=headers or {}), timeout=10) as res:
+            return res.status, res.headers, res.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_http_etag_revalidation(server):
+    status, headers, _ = http_get(f"{server}/channels")
+    assert status == 200
+    status, _, body = http_get(f"{server}/channels", {'If-None-Match': 'W/' + headers['ETag']})
+    assert status == 304 and body == b''
+
+
+def test_http_error_responses(server, monkeypatch):
+    status, _, body = http_get(f"{server}/revenue?by=seller,seller")
+    assert status == 400 and 'error' in json.loads(body)
+    assert http_get(f"{server}/nope")[0] == 404
+
+    def broken(df, params):
+        raise RuntimeError('boom')
+    monkeypatch.setitem(qs.ENDPOINTS, '/summary', (broken, {}))
+    status, _, body = http_get(f"{server}/summary")
+    assert status == 500 and 'boom' in json.loads(body)['error']
+
+
+def test_http_data_unavailable(server, tmp_path):
+    (tmp_path / 'orders.csv').unlink()
+    assert http_get(f"{server}/summary")[0] == 503
+    assert http_get(f"{server}/health")[0] == 503